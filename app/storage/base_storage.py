@@ -2,7 +2,6 @@
 import os
 import random
 import time
-import sqlite3
 from typing import Optional
 from dataclasses import dataclass
 
@@ -195,152 +194,6 @@ class MathConstantStorage:
             
         print("✅ File integrity check complete!")
 
-class FileSource:
-    def __init__(self, filepath: str):
-        self.filepath = filepath
-        self._file_handle = None
-        self._file_size = None
-        
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Pi file not found: {filepath}")
-    
-    def get(self, start: int, length: int) -> str:
-        """Get digits from original file using seek"""
-        if self._file_handle is None:
-            self._file_handle = open(self.filepath, 'r')
-        
-        self._file_handle.seek(start)
-        return self._file_handle.read(length)
-    
-    def get_file_size(self) -> int:
-        """Get total file size in characters"""
-        if self._file_size is None:
-            self._file_size = os.path.getsize(self.filepath)
-        return self._file_size
-
-class SQLiteSource:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self._init_tables()
-    
-    def _init_tables(self):
-        """Initialize database tables"""
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS pi_chunks (
-                chunk_id INTEGER PRIMARY KEY,
-                start_position INTEGER NOT NULL,
-                end_position INTEGER NOT NULL,
-                digits TEXT NOT NULL,
-                checksum TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        self.conn.execute('''
-            CREATE INDEX IF NOT EXISTS idx_position 
-            ON pi_chunks(start_position, end_position)
-        ''')
-        
-        self.conn.commit()
-    
-    def store_chunk(self, chunk_id: int, start_pos: int, digits: str):
-        """Store a chunk with checksum"""
-        end_pos = start_pos + len(digits)
-        checksum = hashlib.md5(digits.encode()).hexdigest()
-        
-        self.conn.execute('''
-            INSERT OR REPLACE INTO pi_chunks 
-            (chunk_id, start_position, end_position, digits, checksum)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (chunk_id, start_pos, end_pos, digits, checksum))
-        
-        self.conn.commit()
-    
-    def get(self, start: int, length: int) -> str:
-        """Get digits from database, potentially spanning multiple chunks"""
-        end = start + length
-        
-        cursor = self.conn.execute('''
-            SELECT start_position, end_position, digits, checksum
-            FROM pi_chunks
-            WHERE start_position < ? AND end_position > ?
-            ORDER BY start_position
-        ''', (end, start))
-        
-        chunks = cursor.fetchall()
-        if not chunks:
-            raise ValueError(f"No data found for range {start}-{end}")
-        
-        result = ""
-        for chunk_start, chunk_end, chunk_digits, checksum in chunks:
-            # Verify checksum
-            if hashlib.md5(chunk_digits.encode()).hexdigest() != checksum:
-                raise CorruptionError(f"Checksum mismatch in chunk {chunk_start}-{chunk_end}")
-            
-            # Calculate overlap with requested range
-            overlap_start = max(start, chunk_start)
-            overlap_end = min(end, chunk_end)
-            
-            if overlap_start < overlap_end:
-                # Extract the relevant portion
-                chunk_offset = overlap_start - chunk_start
-                chunk_length = overlap_end - overlap_start
-                result += chunk_digits[chunk_offset:chunk_offset + chunk_length]
-        
-        if len(result) != length:
-            raise ValueError(f"Retrieved {len(result)} digits, expected {length}")
-        
-        return result
-
-class BinarySource:
-    def __init__(self, binary_path: str):
-        self.binary_path = binary_path
-        self._file_handle = None
-    
-    def store_chunk(self, start_pos: int, digits: str):
-        """Store digits in binary format (4 bits per digit)"""
-        if self._file_handle is None:
-            self._file_handle = open(self.binary_path, 'ab')
-        
-        # Pack 2 digits per byte
-        binary_data = bytearray()
-        for i in range(0, len(digits), 2):
-            if i + 1 < len(digits):
-                # Two digits
-                byte_val = int(digits[i]) * 16 + int(digits[i + 1])
-            else:
-                # One digit (pad with 0)
-                byte_val = int(digits[i]) * 16
-            binary_data.append(byte_val)
-        
-        self._file_handle.write(binary_data)
-        self._file_handle.flush()
-    
-    def get(self, start: int, length: int) -> str:
-        """Get digits from binary file"""
-        if not os.path.exists(self.binary_path):
-            raise FileNotFoundError("Binary cache not built yet")
-        
-        with open(self.binary_path, 'rb') as f:
-            # Calculate byte positions
-            start_byte = start // 2
-            end_byte = (start + length + 1) // 2
-            
-            f.seek(start_byte)
-            binary_data = f.read(end_byte - start_byte)
-            
-            # Unpack bytes to digits
-            digits = ""
-            for byte_val in binary_data:
-                high_digit = byte_val >> 4
-                low_digit = byte_val & 0x0F
-                digits += str(high_digit) + str(low_digit)
-            
-            # Extract exact range
-            offset = start % 2
-            return digits[offset:offset + length]
-
 # Example usage and testing
 if __name__ == "__main__":
     config = StorageConfig()
@@ -2,16 +2,32 @@
 Binary Source - Space-efficient binary storage.
 """
 
+import mmap
 import os
-from typing import Optional
+import threading
+from typing import List, Optional, Tuple
 from app.core.exceptions import StorageError
+from app.storage.digit_packing import is_ascii_digits, pack_digits, unpack_digits
+
+# Pending chunk bytes are written out once the buffer reaches this size
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
 
 
 class BinarySource:
     """Source for reading from binary packed storage."""
     
-    def __init__(self, binary_path: str):
+    def __init__(self, binary_path: str, validate: bool = True):
         self.binary_path = binary_path
+        # Writers feeding already-validated digits can skip the per-write scan
+        self.validate = validate
+        self._mm: Optional[mmap.mmap] = None
+        self._mv: Optional[memoryview] = None
+        self._fd: Optional[int] = None
+        self._write_buf = bytearray()
+        self._write_off: Optional[int] = None
+        # Guards the buffered write run and the read mapping, which a
+        # background verifier may remap while a request is reading it
+        self._write_lock = threading.RLock()
         self._ensure_directory_exists()
     
     def _ensure_directory_exists(self):
@@ -20,105 +36,221 @@ class BinarySource:
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
     
+    def _map(self, end_byte: int) -> memoryview:
+        """Map the binary file read-only, remapping only when a read runs past the mapping
+        
+        Writes through this source land in the page cache the mapping shares,
+        so only growth needs a new mapping; invalidate_cache() handles files
+        rewritten by another process.
+        """
+        if self._mv is not None and end_byte <= len(self._mv):
+            return self._mv
+        
+        fd = os.open(self.binary_path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if self._mv is None or size != len(self._mv):
+                if size == 0:
+                    raise StorageError("Binary cache file is empty")
+                self._unmap()
+                self._mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                self._mv = memoryview(self._mm)
+        finally:
+            os.close(fd)
+        return self._mv
+    
+    def _unmap(self):
+        """Release the current mapping, if any"""
+        if self._mv is not None:
+            self._mv.release()
+            self._mv = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+    
+    def invalidate_cache(self):
+        """Drop the read mapping after another process rewrote the binary file"""
+        with self._write_lock:
+            self._unmap()
+    
     def store_chunk(self, start_pos: int, digits: str):
         """Store digits in binary format (4 bits per digit)"""
-        if not digits.isdigit():
+        if self.validate and not is_ascii_digits(digits):
             raise ValueError("Can only store digit characters")
         
         try:
             # Calculate file position for this chunk
             byte_position = start_pos // 2
+            end_pos = start_pos + len(digits)
             
-            # Open file in read+write mode, create if doesn't exist
-            mode = 'r+b' if os.path.exists(self.binary_path) else 'w+b'
-            
-            with open(self.binary_path, mode) as f:
-                # Seek to the correct position
-                f.seek(byte_position)
+            with self._write_lock:
+                # Chunks on byte boundaries (the usual even chunk_size case)
+                # pack directly. A ragged head or tail shares its byte with a
+                # neighbouring digit, so carry that digit over from storage.
+                if start_pos % 2:
+                    digits = self._stored_digit(start_pos - 1) + digits
+                if end_pos % 2:
+                    digits += self._stored_digit(end_pos)
                 
                 # Pack 2 digits per byte
-                binary_data = bytearray()
-                for i in range(0, len(digits), 2):
-                    if i + 1 < len(digits):
-                        # Two digits
-                        byte_val = int(digits[i]) * 16 + int(digits[i + 1])
-                    else:
-                        # One digit (pad with 0)
-                        byte_val = int(digits[i]) * 16
-                    binary_data.append(byte_val)
+                binary_data = bytes.fromhex(digits)
                 
-                f.write(binary_data)
-                f.flush()
+                # Extend the buffered run if this chunk touches it, else start anew
+                if self._write_off is not None:
+                    run_offset = byte_position - self._write_off
+                    if not 0 <= run_offset <= len(self._write_buf):
+                        self.flush()
+                if self._write_off is None:
+                    self._write_off = byte_position
+                run_offset = byte_position - self._write_off
+                self._write_buf[run_offset:run_offset + len(binary_data)] = binary_data
+                
+                if len(self._write_buf) >= WRITE_BUFFER_SIZE:
+                    self.flush()
                 
         except Exception as e:
             raise StorageError(f"Error storing binary chunk: {e}")
     
+    def _stored_digit(self, position: int) -> str:
+        """Digit currently stored at a position, or '0' past the end of data"""
+        byte_position = position // 2
+        run_offset = (byte_position - self._write_off
+                      if self._write_off is not None else -1)
+        if 0 <= run_offset < len(self._write_buf):
+            byte_val = self._write_buf[run_offset]
+        else:
+            data = os.pread(self._open_fd(), 1, byte_position)
+            if not data:
+                return '0'
+            byte_val = data[0]
+        return '%x' % (byte_val & 0x0F if position % 2 else byte_val >> 4)
+    
+    def _open_fd(self) -> int:
+        """Open the persistent read/write descriptor on first use"""
+        if self._fd is None:
+            self._fd = os.open(self.binary_path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+    
+    def flush(self):
+        """Write buffered chunks to the binary file in a single pwrite"""
+        with self._write_lock:
+            if not self._write_buf:
+                return
+            
+            try:
+                fd = self._open_fd()
+                view = memoryview(self._write_buf)
+                offset = self._write_off
+                while view:
+                    written = os.pwrite(fd, view, offset)
+                    view = view[written:]
+                    offset += written
+                view.release()
+            except OSError as e:
+                raise StorageError(f"Error flushing binary chunks: {e}")
+            
+            self._write_buf = bytearray()
+            self._write_off = None
+    
     def get(self, start: int, length: int) -> str:
         """Get digits from binary file"""
-        if not os.path.exists(self.binary_path):
-            raise FileNotFoundError("Binary cache not built yet")
-        
         if start < 0:
             raise ValueError("Start position cannot be negative")
         if length < 1:
             raise ValueError("Length must be positive")
         
         try:
-            with open(self.binary_path, 'rb') as f:
-                # Calculate byte positions
-                start_byte = start // 2
-                # Need extra byte if we start or end on odd position
-                end_pos = start + length
-                end_byte = (end_pos + 1) // 2
-                
-                f.seek(start_byte)
-                bytes_to_read = end_byte - start_byte
-                binary_data = f.read(bytes_to_read)
-                
-                if not binary_data:
-                    raise StorageError(f"No data available at position {start}")
-                
-                # Unpack bytes to digits
-                digits = ""
-                for byte_val in binary_data:
-                    high_digit = byte_val >> 4
-                    low_digit = byte_val & 0x0F
-                    digits += str(high_digit) + str(low_digit)
+            # Calculate byte positions
+            start_byte = start // 2
+            # Need extra byte if we start or end on odd position
+            end_pos = start + length
+            end_byte = (end_pos + 1) // 2
+            
+            with self._write_lock:
+                self.flush()
+                view = self._map(end_byte)
                 
-                # Extract exact range accounting for odd start positions
-                offset = start % 2
-                result = digits[offset:offset + length]
+                # Slice the mapping directly - no read() syscall or buffer copy
+                with view[start_byte:end_byte] as binary_data:
+                    if not binary_data:
+                        raise StorageError(f"No data available at position {start}")
+                    
+                    # Unpack bytes to digits
+                    digits = unpack_digits(binary_data)
+            
+            # Extract exact range accounting for odd start positions
+            offset = start % 2
+            result = digits[offset:offset + length]
+            
+            if len(result) != length:
+                raise StorageError(f"Retrieved {len(result)} digits, expected {length}")
+            
+            return result
                 
-                if len(result) != length:
-                    raise StorageError(f"Retrieved {len(result)} digits, expected {length}")
+        except FileNotFoundError:
+            raise FileNotFoundError("Binary cache not built yet")
+        except Exception as e:
+            raise StorageError(f"Error reading from binary file: {e}")
+    
+    def get_many(self, ranges: List[Tuple[int, int]]) -> List[str]:
+        """Get several (start, length) ranges, decoding each contiguous span once"""
+        if len(ranges) <= 1:
+            return [self.get(start, length) for start, length in ranges]
+        
+        for start, length in ranges:
+            if start < 0:
+                raise ValueError("Start position cannot be negative")
+            if length < 1:
+                raise ValueError("Length must be positive")
+        
+        # Coalesce overlapping or adjacent requests into byte spans
+        spans = []
+        for index in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+            start, length = ranges[index]
+            start_byte = start // 2
+            end_byte = (start + length + 1) // 2
+            if spans and start_byte <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end_byte)
+                spans[-1][2].append(index)
+            else:
+                spans.append([start_byte, end_byte, [index]])
+        
+        results: List[str] = [""] * len(ranges)
+        try:
+            for start_byte, end_byte, indices in spans:
+                with self._write_lock:
+                    self.flush()
+                    view = self._map(end_byte)
+                    with view[start_byte:end_byte] as binary_data:
+                        digits = unpack_digits(binary_data)
                 
-                return result
+                for index in indices:
+                    start, length = ranges[index]
+                    offset = start - start_byte * 2
+                    result = digits[offset:offset + length]
+                    
+                    if len(result) != length:
+                        raise StorageError(f"Retrieved {len(result)} digits at position {start}, expected {length}")
+                    
+                    results[index] = result
+            
+            return results
                 
         except FileNotFoundError:
-            raise FileNotFoundError("Binary cache file not found")
+            raise FileNotFoundError("Binary cache not built yet")
         except Exception as e:
             raise StorageError(f"Error reading from binary file: {e}")
     
     def append_digits(self, digits: str):
         """Append digits to the end of the binary file"""
-        if not digits.isdigit():
+        if self.validate and not is_ascii_digits(digits):
             raise ValueError("Can only store digit characters")
         
         try:
+            self.flush()
             with open(self.binary_path, 'ab') as f:
                 # Pack 2 digits per byte
-                binary_data = bytearray()
-                for i in range(0, len(digits), 2):
-                    if i + 1 < len(digits):
-                        # Two digits
-                        byte_val = int(digits[i]) * 16 + int(digits[i + 1])
-                    else:
-                        # One digit (pad with 0)
-                        byte_val = int(digits[i]) * 16
-                    binary_data.append(byte_val)
-                
-                f.write(binary_data)
-                f.flush()
+                f.write(pack_digits(digits))
                 
         except Exception as e:
             raise StorageError(f"Error appending to binary file: {e}")
@@ -147,6 +279,11 @@ class BinarySource:
     def clear_file(self):
         """Clear the binary file (use with caution)"""
         try:
+            with self._write_lock:
+                self._write_buf = bytearray()
+                self._write_off = None
+                self._close_fd()
+            self._unmap()
             if os.path.exists(self.binary_path):
                 os.remove(self.binary_path)
                 print(f"✅ Binary file cleared: {self.binary_path}")
@@ -215,10 +352,19 @@ class BinarySource:
         except Exception as e:
             return {'error': str(e)}
     
+    def _close_fd(self):
+        """Close the persistent write descriptor, if open"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
     def close(self):
-        """Close file handle if open (for compatibility)"""
-        # This implementation uses context managers, so no persistent handle
-        pass
+        """Flush pending writes and release file resources"""
+        try:
+            self.flush()
+        finally:
+            self._close_fd()
+            self._unmap()
     
     def __del__(self):
         """Cleanup file handle on deletion"""
@@ -0,0 +1,28 @@
+"""
+Digit Packing - Two decimal digits per byte, shared by the binary and SQLite caches.
+"""
+
+
+def pack_digits(digits: str) -> bytes:
+    """Pack decimal digits two per byte, padding an odd tail with 0.
+    
+    Each digit is a nibble in 0-9, so the packed form is exactly the bytes
+    whose hex spelling is the digit string and the codec can run in C.
+    """
+    if len(digits) % 2:
+        digits += '0'
+    return bytes.fromhex(digits)
+
+
+def is_ascii_digits(digits: str) -> bool:
+    """True if digits is non-empty and only contains the ASCII digits 0-9.
+    
+    str.isdigit() alone also accepts characters such as '²' or '٣' that the
+    hex codec cannot pack; isascii() is a constant-time flag check.
+    """
+    return digits.isascii() and digits.isdigit()
+
+
+def unpack_digits(binary_data) -> str:
+    """Unpack a bytes-like object of packed digits (two per byte)"""
+    return binary_data.hex()
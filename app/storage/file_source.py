@@ -2,7 +2,10 @@
 File Source - Original file access for mathematical constants.
 """
 
+import mmap
 import os
+import threading
+from contextlib import contextmanager
 from typing import Optional
 from app.core.exceptions import StorageError
 
@@ -12,7 +15,15 @@ class FileSource:
     
     def __init__(self, filepath: str):
         self.filepath = filepath
-        self._file_handle: Optional[object] = None
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        # Number of scans currently inside sequential_access(); a search may
+        # overlap a cache build on another thread
+        self._sequential = 0
+        self._advice_lock = threading.Lock()
+        # Serializes remapping after the file grows; request threads and the
+        # background verifier read concurrently
+        self._map_lock = threading.Lock()
         self._file_size: Optional[int] = None
         
         if not os.path.exists(filepath):
@@ -27,30 +38,116 @@ class FileSource:
                     raise StorageError(f"File appears to be empty: {filepath}")
         except Exception as e:
             raise StorageError(f"Cannot read file {filepath}: {e}")
+        
+        self._fd = self._open_readonly(filepath)
+        self._map()
+    
+    @staticmethod
+    def _open_readonly(filepath: str) -> int:
+        """Open a read-only descriptor, skipping atime updates where permitted"""
+        noatime = getattr(os, 'O_NOATIME', 0)
+        try:
+            return os.open(filepath, os.O_RDONLY | noatime)
+        except PermissionError:
+            # O_NOATIME is only allowed for the file owner
+            if not noatime:
+                raise
+            return os.open(filepath, os.O_RDONLY)
+    
+    def _map(self) -> mmap.mmap:
+        """Map the whole file read-only
+        
+        The new mapping replaces the old one without closing it: other threads
+        may still be slicing the old map, which is unmapped once they drop it.
+        """
+        mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        self._advise(mm)
+        self._mm = mm
+        return mm
+    
+    def _advise(self, mm: Optional[mmap.mmap] = None):
+        """Hint the kernel about the current access pattern.
+        
+        Queries jump around the file, so read-ahead is disabled by default;
+        full scans switch to sequential read-ahead via sequential_access().
+        """
+        if hasattr(os, 'posix_fadvise'):
+            advice = os.POSIX_FADV_SEQUENTIAL if self._sequential else os.POSIX_FADV_RANDOM
+            os.posix_fadvise(self._fd, 0, 0, advice)
+        if hasattr(mmap, 'MADV_RANDOM'):
+            advice = mmap.MADV_SEQUENTIAL if self._sequential else mmap.MADV_RANDOM
+            (self._mm if mm is None else mm).madvise(advice)
+    
+    @contextmanager
+    def sequential_access(self):
+        """Use sequential read-ahead for the duration of a full-file scan"""
+        with self._advice_lock:
+            self._sequential += 1
+            if self._sequential == 1:
+                self._advise()
+        try:
+            yield self
+        finally:
+            with self._advice_lock:
+                self._sequential -= 1
+                if self._sequential == 0:
+                    self._advise()
     
     def get(self, start: int, length: int) -> str:
-        """Get content from original file using seek"""
+        """Get content from original file by slicing the memory map"""
+        try:
+            return self.get_bytes(start, length).decode('ascii')
+        except UnicodeDecodeError as e:
+            raise StorageError(f"Unexpected error reading file: {e}")
+    
+    def get_bytes(self, start: int, length: int) -> bytes:
+        """Get raw bytes from original file by slicing the memory map"""
         if start < 0:
             raise ValueError("Start position cannot be negative")
         if length < 1:
             raise ValueError("Length must be positive")
             
         try:
-            # Use context manager for better resource handling
-            with open(self.filepath, 'r') as f:
-                f.seek(start)
-                content = f.read(length)
-                
-                if not content and start == 0:
-                    raise StorageError("File appears to be empty")
-                
-                return content
+            end = start + length
+            mm = self._mm
+            if end > len(mm) and os.fstat(self._fd).st_size > len(mm):
+                # The file has grown since it was mapped
+                with self._map_lock:
+                    mm = self._mm
+                    if os.fstat(self._fd).st_size > len(mm):
+                        mm = self._map()
+            
+            content = mm[start:end]
+            
+            if not content and start == 0:
+                raise StorageError("File appears to be empty")
+            
+            return content
                 
         except IOError as e:
             raise StorageError(f"Error reading from file: {e}")
         except Exception as e:
             raise StorageError(f"Unexpected error reading file: {e}")
     
+    def read_into(self, buf: bytearray, start: int, length: int) -> int:
+        """Read up to length raw bytes at start into buf, returning the count read"""
+        if start < 0:
+            raise ValueError("Start position cannot be negative")
+        if length > len(buf):
+            raise ValueError("Buffer is smaller than the requested length")
+        
+        try:
+            total = 0
+            with memoryview(buf) as view:
+                while total < length:
+                    read = os.preadv(self._fd, [view[total:length]], start + total)
+                    if read == 0:
+                        break  # End of file
+                    total += read
+            return total
+        except OSError as e:
+            raise StorageError(f"Error reading from file: {e}")
+    
     def get_file_size(self) -> int:
         """Get total file size in characters"""
         if self._file_size is None:
@@ -111,35 +208,15 @@ class FileSource:
         positions = []
         
         try:
-            with open(self.filepath, 'r') as f:
-                position = 0
-                chunk_size = 1000000  # 1MB chunks
-                overlap = len(pattern) - 1
-                
-                while len(positions) < max_results:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    
-                    # Find all occurrences in this chunk
-                    start_pos = 0
-                    while start_pos < len(chunk):
-                        found_pos = chunk.find(pattern, start_pos)
-                        if found_pos == -1:
-                            break
-                        
-                        positions.append(position + found_pos)
-                        if len(positions) >= max_results:
-                            break
-                        
-                        start_pos = found_pos + 1
-                    
-                    position += len(chunk) - overlap
-                    if len(chunk) < chunk_size:
-                        break
-                    
-                    # Seek back for overlap
-                    f.seek(position)
+            needle = pattern.encode('ascii')
+            
+            # Scan the whole mapping in C - no chunking or overlap bookkeeping
+            mm = self._mm
+            with self.sequential_access():
+                found_pos = mm.find(needle)
+                while found_pos != -1 and len(positions) < max_results:
+                    positions.append(found_pos)
+                    found_pos = mm.find(needle, found_pos + 1)
                     
         except Exception as e:
             raise StorageError(f"Error searching file: {e}")
@@ -169,10 +246,14 @@ class FileSource:
             }
     
     def close(self):
-        """Close file handle if open (for compatibility)"""
-        # This implementation uses context managers, so no persistent handle
-        pass
+        """Close the memory map and the persistent read descriptor"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
     
     def __del__(self):
-        """Cleanup file handle on deletion (for compatibility)"""
+        """Cleanup file descriptor on deletion"""
         self.close()
\ No newline at end of file
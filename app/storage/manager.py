@@ -1,7 +1,12 @@
 # app/storage/manager.py
+import logging
 import os
+import queue
 import random
+import threading
 import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
 from dataclasses import dataclass
 
@@ -11,14 +16,56 @@ from app.storage.binary_source import BinarySource
 from app.core.exceptions import CorruptionError, StorageError
 from app.core.constants import KNOWN_PREFIXES
 
+logger = logging.getLogger(__name__)
+
+# Chunk-aligned reads are covered by the SQLite checksum; only every Nth one
+# that comes up for verification is still cross-checked against file and binary
+ALIGNED_FULL_CHECK_EVERY = 10000
+
+# Periodic verifications waiting for the background verifier; extras are dropped
+VERIFY_QUEUE_SIZE = 64
+
+# Formatting characters stripped from the original files
+_FORMATTING_BYTES = b'. \n\r'
+_FORMATTING_TABLE = str.maketrans('', '', _FORMATTING_BYTES.decode('ascii'))
+
+# Reverse lookup so identifying a file's constant is a single dict hit
+_PREFIX_TO_NAME = {prefix: constant_id for constant_id, prefix in KNOWN_PREFIXES.items()}
+
+def _verifier_loop(manager_ref, verify_queue: queue.Queue):
+    """Cross-check sampled results off the request path until None arrives
+    
+    Holds the manager weakly between items so it can still be collected
+    (and its __del__ cleanup can stop this thread).
+    """
+    while True:
+        item = verify_queue.get()
+        manager = manager_ref()
+        if item is None or manager is None:
+            return
+        start, length, result = item
+        try:
+            manager._cross_check(start, length, result)
+        except CorruptionError as e:
+            manager.verify_failures += 1
+            logger.error("Background verification failed: %s", e)
+        except Exception as e:
+            logger.warning("Background verification of position %d skipped: %s", start, e)
+        del manager
+
+
 @dataclass
 class StorageConfig:
     """Configuration for storage system"""
     original_file: str = "/app/data/pi_digits.txt"
     sqlite_db: str = "/app/data/pi_chunks.db"
     binary_file: str = "/app/data/pi_binary.dat"
-    chunk_size: int = 10000  # digits per chunk
+    # Digits per chunk. SQLite packs two digits per byte, so the default is a
+    # 5000-byte row and rows stay inside a single 8 KiB page below ~16200
+    # digits (~7800 on a 4 KiB page); larger chunks spill into overflow pages
+    chunk_size: int = 10000
     verify_every: int = 100  # verify every N requests
+    write_batch_size: int = 256  # chunks per SQLite commit while building
 
 class MathConstantManager:
     """Main manager for mathematical constant storage with triple redundancy"""
@@ -26,6 +73,7 @@ class MathConstantManager:
     def __init__(self, config: StorageConfig):
         self.config = config
         self.request_count = 0
+        self.aligned_verify_count = 0
         
         print(f"🔧 Initializing storage with config:")
         print(f"   📁 Original file: {config.original_file}")
@@ -51,11 +99,19 @@ class MathConstantManager:
         self.sqlite_source = SQLiteSource(config.sqlite_db)
         
         print("🔧 Initializing binary source...")
-        self.binary_source = BinarySource(config.binary_file)
+        # Cache builds only feed digits already cleaned from the original file
+        self.binary_source = BinarySource(config.binary_file, validate=False)
         
         # Verify file integrity on startup
         print("🔍 Verifying file integrity...")
         self._verify_integrity()
+        
+        # Periodic cross-checks run here instead of stalling the request
+        self.verify_failures = 0
+        self._verify_queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=VERIFY_QUEUE_SIZE)
+        self._verifier = threading.Thread(target=_verifier_loop, args=(weakref.ref(self), self._verify_queue),
+                                          name="digit-verifier", daemon=True)
+        self._verifier.start()
         print("✅ Storage initialization complete!")
     
     def get_digits(self, start: int, length: int, force_verify: bool = False) -> str:
@@ -66,41 +122,58 @@ class MathConstantManager:
         should_verify = (force_verify or 
                         self.request_count % self.config.verify_every == 0)
         
+        # Sampled reads have SQLite check each chunk's checksum, which alone
+        # proves a read that stays inside one chunk
+        verify_checksums = should_verify
+        if should_verify and not force_verify:
+            aligned = start % self.config.chunk_size == 0 and length <= self.config.chunk_size
+            if aligned:
+                self.aligned_verify_count += 1
+                should_verify = self.aligned_verify_count % ALIGNED_FULL_CHECK_EVERY == 0
+        
         try:
             # Try SQLite first (fastest for random access)
             if self.has_sqlite_cache():
                 try:
-                    result = self.sqlite_source.get(start, length)
+                    result = self.sqlite_source.get(start, length, verify=verify_checksums)
                     
-                    if should_verify:
-                        # Verify against original file
-                        file_result = self._get_cleaned_digits_from_file(start, length)
-                        
-                        if result != file_result:
-                            raise CorruptionError(f"SQLite corruption at position {start}")
-                        
-                        # Also verify binary if available
-                        if self.has_binary_cache():
-                            try:
-                                binary_result = self.binary_source.get(start, length)
-                                if result != binary_result:
-                                    raise CorruptionError(f"Binary corruption at position {start}")
-                            except FileNotFoundError:
-                                pass  # Binary might not be fully built yet
+                    if force_verify:
+                        self._cross_check(start, length, result)
+                    elif should_verify:
+                        try:
+                            self._verify_queue.put_nowait((start, length, result))
+                        except queue.Full:
+                            pass  # Verifier is behind; skip this sample
                     
                     return result
                 except (ValueError, CorruptionError):
-                    print(f"SQLite cache failed for position {start}, falling back to file")
-                    pass
+                    logger.warning("SQLite cache failed for position %d, falling back to file", start)
             
             # Fallback to original file (most reliable)
             return self._get_cleaned_digits_from_file(start, length)
             
         except Exception as e:
-            print(f"All sources failed: {e}, attempting file fallback")
+            logger.warning("All sources failed: %s, attempting file fallback", e)
             # Last resort fallback to original file
             return self._get_cleaned_digits_from_file(start, length)
     
+    def _cross_check(self, start: int, length: int, result: str):
+        """Compare a SQLite result against the original file and binary cache"""
+        # Verify against original file
+        file_result = self._get_cleaned_digits_from_file(start, length)
+        
+        if result != file_result:
+            raise CorruptionError(f"SQLite corruption at position {start}")
+        
+        # Also verify binary if available
+        if self.has_binary_cache():
+            try:
+                binary_result = self.binary_source.get(start, length)
+                if result != binary_result:
+                    raise CorruptionError(f"Binary corruption at position {start}")
+            except FileNotFoundError:
+                pass  # Binary might not be fully built yet
+    
     def search_sequence(self, sequence: str, max_results: int = 100, start_from: int = 0) -> List[int]:
         """Search for a specific digit sequence"""
         positions = []
@@ -121,13 +194,12 @@ class MathConstantManager:
                 chunk = self.get_digits(current_pos, chunk_size)
                 
                 # Find all occurrences in this chunk
-                pos = 0
-                while pos < len(chunk) - len(sequence) + 1:
-                    if chunk[pos:pos + len(sequence)] == sequence:
-                        positions.append(current_pos + pos)
-                        if len(positions) >= max_results:
-                            break
-                    pos += 1
+                pos = chunk.find(sequence)
+                while pos != -1:
+                    positions.append(current_pos + pos)
+                    if len(positions) >= max_results:
+                        break
+                    pos = chunk.find(sequence, pos + 1)
                 
                 # Move to next chunk with overlap to catch sequences spanning chunks
                 current_pos += search_chunk_size - len(sequence) + 1
@@ -141,13 +213,24 @@ class MathConstantManager:
         """Get digits from file, handling decimal points and formatting"""
         # Read a bit more to account for potential decimal points
         buffer_size = length + 10  # Extra buffer for decimal points
-        raw_content = self.file_source.get(start, buffer_size)
+        raw_content = self.file_source.get_bytes(start, buffer_size)
         
-        # Clean the content
-        cleaned_content = raw_content.replace('.', '').replace(' ', '').replace('\n', '').replace('\r', '')
+        # Clean the content in a single C-level pass over the mapped bytes
+        cleaned_content = raw_content.translate(None, _FORMATTING_BYTES)
         
-        # Return exactly the requested length
-        return cleaned_content[:length]
+        # Decode exactly the requested length through a view, skipping the slice copy
+        with memoryview(cleaned_content) as view:
+            return str(view[:length], 'ascii')
+    
+    def _read_cleaned_into(self, buf: bytearray, start: int, length: int) -> str:
+        """_get_cleaned_digits_from_file, reading through a reusable buffer"""
+        n = self.file_source.read_into(buf, start, length + 10)
+        with memoryview(buf) as view:
+            # Most chunks hold no formatting at all; decode them straight from the buffer
+            if all(buf.find(byte, 0, n) == -1 for byte in _FORMATTING_BYTES):
+                return str(view[:min(n, length)], 'ascii')
+            cleaned_content = bytes(view[:n]).translate(None, _FORMATTING_BYTES)
+        return cleaned_content[:length].decode('ascii')
     
     def build_caches(self, progress_callback=None):
         """Build SQLite and binary caches from original file"""
@@ -160,20 +243,47 @@ class MathConstantManager:
             print(f"📊 File size: {file_size:,} characters")
             print(f"📦 Will create {chunks_total:,} chunks of {self.config.chunk_size:,} digits each")
             
-            for chunk_id in range(chunks_total):
-                start_pos = chunk_id * self.config.chunk_size
-                chunk_length = min(self.config.chunk_size, file_size - start_pos)
-                
-                # Read from original file
-                chunk_data = self._get_cleaned_digits_from_file(start_pos, chunk_length)
-                
-                # Store in both caches
-                print(f"💾 Storing chunk {chunk_id + 1}/{chunks_total} (position {start_pos:,})")
-                self.sqlite_source.store_chunk(chunk_id, start_pos, chunk_data)
-                self.binary_source.store_chunk(start_pos, chunk_data)
+            # Report progress about once per percent instead of once per chunk
+            progress_every = max(1, chunks_total // 100)
+            # One read buffer serves every chunk (+10 as in _get_cleaned_digits_from_file)
+            read_buf = bytearray(self.config.chunk_size + 10)
+            batch = []
+            pending_write = None
+            # Each batch is validated, packed, hashed and inserted on a writer
+            # thread while the next batch is read; only the SQLite insert
+            # releases the GIL, so that is the part that overlaps with reading
+            with ThreadPoolExecutor(max_workers=1) as writer, self.file_source.sequential_access():
+                for chunk_id in range(chunks_total):
+                    start_pos = chunk_id * self.config.chunk_size
+                    chunk_length = min(self.config.chunk_size, file_size - start_pos)
+                    
+                    # Read from original file
+                    chunk_data = self._read_cleaned_into(read_buf, start_pos, chunk_length)
+                    
+                    # Store in both caches
+                    logger.debug("Storing chunk %d/%d (position %d)", chunk_id + 1, chunks_total, start_pos)
+                    if (chunk_id + 1) % progress_every == 0 or chunk_id + 1 == chunks_total:
+                        print(f"💾 Processed {chunk_id + 1:,}/{chunks_total:,} chunks (position {start_pos:,})")
+                    batch.append((chunk_id, start_pos, chunk_data))
+                    self.binary_source.store_chunk(start_pos, chunk_data)
+                    
+                    if len(batch) >= self.config.write_batch_size:
+                        # Keep at most one batch in flight so memory stays bounded
+                        if pending_write:
+                            pending_write.result()
+                        pending_write = writer.submit(self.sqlite_source.store_chunks, batch)
+                        batch = []
+                    
+                    if progress_callback:
+                        progress_callback(chunk_id + 1, chunks_total)
                 
-                if progress_callback:
-                    progress_callback(chunk_id + 1, chunks_total)
+                if pending_write:
+                    pending_write.result()
+            
+            # Write out chunks still held back for batching
+            if batch:
+                self.sqlite_source.store_chunks(batch)
+            self.binary_source.flush()
             
             print("✅ Cache building complete!")
             print(f"📁 Cache files created:")
@@ -194,7 +304,7 @@ class MathConstantManager:
             print(f"📖 Raw content from file: {raw_content}")
             
             # Clean the content - remove decimal points and any whitespace
-            cleaned_content = raw_content.replace('.', '').replace(' ', '').replace('\n', '').replace('\r', '')
+            cleaned_content = raw_content.translate(_FORMATTING_TABLE)
             print(f"🧹 Cleaned content: {cleaned_content}")
             
             # Get first 50 digits for verification
@@ -202,11 +312,7 @@ class MathConstantManager:
             print(f"🔢 First 50 digits: {actual_digits}")
             
             # Try to identify the mathematical constant
-            constant_found = None
-            for constant_name, known_prefix in KNOWN_PREFIXES.items():
-                if actual_digits == known_prefix:
-                    constant_found = constant_name
-                    break
+            constant_found = _PREFIX_TO_NAME.get(actual_digits)
             
             if constant_found:
                 from app.core.constants import MATH_CONSTANTS
@@ -244,6 +350,9 @@ class MathConstantManager:
     def cleanup(self):
         """Cleanup resources"""
         try:
+            verifier = getattr(self, '_verifier', None)
+            if verifier and verifier.is_alive():
+                self._stop_verifier(verifier)
             if hasattr(self, 'file_source'):
                 self.file_source.close()
             if hasattr(self, 'sqlite_source'):
@@ -253,6 +362,30 @@ class MathConstantManager:
         except Exception as e:
             print(f"Warning: Error during cleanup: {e}")
     
+    def _stop_verifier(self, verifier: threading.Thread):
+        """Send the verifier its None sentinel without ever blocking on the queue"""
+        if verifier is threading.current_thread():
+            # Dropping the last reference inside _cross_check lands here; a full
+            # queue still has items, and the loop exits at the next one it sees
+            # because the manager is gone
+            try:
+                self._verify_queue.put_nowait(None)
+            except queue.Full:
+                pass
+            return
+        
+        while True:
+            try:
+                self._verify_queue.put_nowait(None)
+                break
+            except queue.Full:
+                # Pending samples are best-effort; make room for the sentinel
+                try:
+                    self._verify_queue.get_nowait()
+                except queue.Empty:
+                    pass
+        verifier.join(timeout=5)
+    
     def __del__(self):
         """Cleanup on deletion"""
         self.cleanup()
\ No newline at end of file
@@ -5,7 +5,11 @@ Multi-Constant Manager
 Manages multiple mathematical constants simultaneously with smart cache detection.
 """
 
+import multiprocessing
 import os
+import time
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -14,6 +18,9 @@ from app.core.constants import MATH_CONSTANTS, CONSTANT_FILES
 from app.core.exceptions import StorageError
 from app.core.config import settings
 
+# Status polls within this many seconds reuse the previous answer
+STATUS_TTL_SECONDS = 2.0
+
 
 @dataclass
 class ConstantStatus:
@@ -26,6 +33,25 @@ class ConstantStatus:
     cache_complete: bool
     file_size: int
     cached_digits: int
+
+
+def _build_one(constant_id: str, config: StorageConfig, progress_queue=None) -> str:
+    """Build one constant's caches in a worker process
+    
+    Workers open their own manager because SQLite connections and memory maps
+    cannot be shared with the parent process.
+    """
+    progress_callback = None
+    if progress_queue is not None:
+        def progress_callback(done: int, total: int):
+            progress_queue.put((constant_id, done, total))
+    
+    manager = MathConstantManager(config)
+    try:
+        manager.build_caches(progress_callback=progress_callback)
+    finally:
+        manager.cleanup()
+    return constant_id
     
 
 class MultiConstantManager:
@@ -34,9 +60,13 @@ class MultiConstantManager:
     def __init__(self):
         self.managers: Dict[str, MathConstantManager] = {}
         self.available_constants: List[str] = []
+        # Settings don't change at runtime, so paths are resolved once up front
+        self._path_maps = self._build_path_maps()
+        self._status_cache: Dict[str, Tuple[float, ConstantStatus]] = {}
         
         print("🔧 Initializing Multi-Constant Manager...")
         self._discover_and_initialize_constants()
+        self._available_tuple: Tuple[str, ...] = tuple(self.available_constants)
         print(f"✅ Initialized {len(self.managers)} mathematical constant(s)")
     
     def _discover_and_initialize_constants(self):
@@ -81,59 +111,34 @@ class MultiConstantManager:
                 print(f"❌ Failed to initialize {constant_info.name}: {e}")
                 continue
     
+    @staticmethod
+    def _build_path_maps() -> Dict[str, Dict[str, str]]:
+        """Resolve every constant's file, SQLite and binary paths from settings
+        
+        Constants without a setting are left out so the accessors fall back
+        to their default paths.
+        """
+        path_maps = {}
+        for kind, suffix in (("file", "file_path"), ("sqlite", "sqlite_db"), ("binary", "binary_file")):
+            paths = {}
+            for constant_id in MATH_CONSTANTS:
+                path = getattr(settings, f"{constant_id}_{suffix}", None)
+                if path is not None:
+                    paths[constant_id] = path
+            path_maps[kind] = paths
+        return path_maps
+    
     def _get_file_path(self, constant_id: str) -> str:
         """Get file path for a constant from settings"""
-        path_mapping = {
-            "catalan": settings.catalan_file_path,
-            "e": settings.e_file_path,
-            "eulers": settings.eulers_file_path,
-            "lemniscate": settings.lemniscate_file_path,
-            "log10": settings.log10_file_path,
-            "log2": settings.log2_file_path,
-            "log3": settings.log3_file_path,
-            "phi": settings.phi_file_path,
-            "pi": settings.pi_file_path,
-            "sqrt2": settings.sqrt2_file_path,
-            "sqrt3": settings.sqrt3_file_path,
-            "zeta3": settings.zeta3_file_path,
-        }
-        return path_mapping.get(constant_id, f"/app/data/{constant_id}_digits.txt")
+        return self._path_maps["file"].get(constant_id, f"/app/data/{constant_id}_digits.txt")
     
     def _get_sqlite_path(self, constant_id: str) -> str:
         """Get SQLite database path for a constant"""
-        path_mapping = {
-            "catalan": settings.catalan_sqlite_db,
-            "e": settings.e_sqlite_db,
-            "eulers": settings.eulers_sqlite_db,
-            "lemniscate": settings.lemniscate_sqlite_db,
-            "log10": settings.log10_sqlite_db,
-            "log2": settings.log2_sqlite_db,
-            "log3": settings.log3_sqlite_db,
-            "phi": settings.phi_sqlite_db,
-            "pi": settings.pi_sqlite_db,
-            "sqrt2": settings.sqrt2_sqlite_db,
-            "sqrt3": settings.sqrt3_sqlite_db,
-            "zeta3": settings.zeta3_sqlite_db,
-        }
-        return path_mapping.get(constant_id, f"/app/data/{constant_id}_chunks.db")
+        return self._path_maps["sqlite"].get(constant_id, f"/app/data/{constant_id}_chunks.db")
     
     def _get_binary_path(self, constant_id: str) -> str:
         """Get binary file path for a constant"""
-        path_mapping = {
-            "catalan": settings.catalan_binary_file,
-            "e": settings.e_binary_file,
-            "eulers": settings.eulers_binary_file,
-            "lemniscate": settings.lemniscate_binary_file,
-            "log10": settings.log10_binary_file,
-            "log2": settings.log2_binary_file,
-            "log3": settings.log3_binary_file,
-            "phi": settings.phi_binary_file,
-            "pi": settings.pi_binary_file,
-            "sqrt2": settings.sqrt2_binary_file,
-            "sqrt3": settings.sqrt3_binary_file,
-            "zeta3": settings.zeta3_binary_file,
-        }
-        return path_mapping.get(constant_id, f"/app/data/{constant_id}_binary.dat")
+        return self._path_maps["binary"].get(constant_id, f"/app/data/{constant_id}_binary.dat")
     
     def get_manager(self, constant_id: str) -> MathConstantManager:
         """Get manager for a specific constant"""
@@ -145,15 +150,26 @@ class MultiConstantManager:
         """Check if a constant is available"""
         return constant_id in self.managers
     
-    def get_available_constants(self) -> List[str]:
-        """Get list of available constant IDs"""
-        return self.available_constants.copy()
+    def get_available_constants(self) -> Tuple[str, ...]:
+        """Get the available constant IDs"""
+        return self._available_tuple
     
     def get_constant_status(self, constant_id: str) -> ConstantStatus:
-        """Get detailed status for a constant"""
+        """Get detailed status for a constant, memoized for STATUS_TTL_SECONDS"""
         if constant_id not in MATH_CONSTANTS:
             raise ValueError(f"Unknown constant: {constant_id}")
         
+        cached = self._status_cache.get(constant_id)
+        now = time.monotonic()
+        if cached and now - cached[0] < STATUS_TTL_SECONDS:
+            return cached[1]
+        
+        status = self._compute_constant_status(constant_id)
+        self._status_cache[constant_id] = (now, status)
+        return status
+    
+    def _compute_constant_status(self, constant_id: str) -> ConstantStatus:
+        """Stat the file and query the cache coverage for a constant"""
         constant_info = MATH_CONSTANTS[constant_id]
         file_path = self._get_file_path(constant_id)
         
@@ -225,6 +241,7 @@ class MultiConstantManager:
             manager.build_caches(progress_callback=progress_callback)
             
             # Verify the build
+            self._status_cache.pop(constant_id, None)
             status = self.get_constant_status(constant_id)
             
             return {
@@ -235,6 +252,7 @@ class MultiConstantManager:
                 "cache_complete": status.cache_complete
             }
         except Exception as e:
+            self._status_cache.pop(constant_id, None)
             print(f"❌ Failed to build cache for {constant_info.name}: {e}")
             return {
                 "constant": constant_id,
@@ -244,8 +262,14 @@ class MultiConstantManager:
             }
     
     def build_all_caches(self, force_rebuild: bool = False, progress_callback=None) -> List[dict]:
-        """Build caches for all available constants"""
-        results = []
+        """Build caches for all available constants
+        
+        Each constant has its own file and databases, so the builds run in
+        parallel worker processes. progress_callback, if given, is called as
+        progress_callback(constant_id, done, total).
+        """
+        results = {}
+        pending = []
         
         print(f"🏗️  Building caches for {len(self.available_constants)} constant(s)...")
         print(f"   Force rebuild: {force_rebuild}")
@@ -254,8 +278,23 @@ class MultiConstantManager:
             constant_info = MATH_CONSTANTS[constant_id]
             print(f"\n[{i}/{len(self.available_constants)}] Processing {constant_info.name}...")
             
-            result = self.build_cache(constant_id, force_rebuild=force_rebuild, progress_callback=progress_callback)
-            results.append(result)
+            if not force_rebuild:
+                status = self.get_constant_status(constant_id)
+                if status.cache_exists and status.cache_complete:
+                    results[constant_id] = self.build_cache(constant_id)
+                    continue
+            pending.append(constant_id)
+        
+        if len(pending) == 1:
+            constant_id = pending[0]
+            results[constant_id] = self.build_cache(
+                constant_id, force_rebuild=True,
+                progress_callback=partial(progress_callback, constant_id) if progress_callback else None
+            )
+        elif pending:
+            results.update(self._build_in_processes(pending, progress_callback))
+        
+        results = [results[constant_id] for constant_id in self.available_constants]
         
         # Summary
         print("\n" + "="*60)
@@ -273,6 +312,68 @@ class MultiConstantManager:
         
         return results
     
+    def _build_in_processes(self, constant_ids: List[str], progress_callback=None) -> Dict[str, dict]:
+        """Build several constants at once, one worker process per constant"""
+        results = {}
+        # Spawned workers start clean instead of inheriting open SQLite handles
+        context = multiprocessing.get_context("spawn")
+        sync_manager = context.Manager() if progress_callback else None
+        progress_queue = sync_manager.Queue() if sync_manager else None
+        max_workers = min(len(constant_ids), os.cpu_count() or 1)
+        
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                futures = {}
+                for constant_id in constant_ids:
+                    constant_info = MATH_CONSTANTS[constant_id]
+                    print(f"🏗️  Building cache for {constant_info.name} ({constant_info.symbol})...")
+                    config = self.managers[constant_id].config
+                    futures[executor.submit(_build_one, constant_id, config, progress_queue)] = constant_id
+                
+                not_done = set(futures)
+                while not_done:
+                    done, not_done = wait(not_done, timeout=0.5, return_when=FIRST_COMPLETED)
+                    while progress_queue is not None and not progress_queue.empty():
+                        progress_callback(*progress_queue.get())
+                    
+                    for future in done:
+                        constant_id = futures[future]
+                        results[constant_id] = self._build_outcome(constant_id, future)
+        finally:
+            if sync_manager:
+                sync_manager.shutdown()
+        
+        return results
+    
+    def _build_outcome(self, constant_id: str, future) -> dict:
+        """Result entry for a constant built by a worker process"""
+        constant_info = MATH_CONSTANTS[constant_id]
+        try:
+            future.result()
+        except Exception as e:
+            self._status_cache.pop(constant_id, None)
+            print(f"❌ Failed to build cache for {constant_info.name}: {e}")
+            return {
+                "constant": constant_id,
+                "name": constant_info.name,
+                "status": "failed",
+                "error": str(e)
+            }
+        
+        # The worker wrote through its own connections; drop our stale copies
+        manager = self.managers[constant_id]
+        manager.sqlite_source.invalidate_cache()
+        manager.binary_source.invalidate_cache()
+        self._status_cache.pop(constant_id, None)
+        status = self.get_constant_status(constant_id)
+        return {
+            "constant": constant_id,
+            "name": constant_info.name,
+            "status": "success",
+            "cached_digits": status.cached_digits,
+            "cache_complete": status.cache_complete
+        }
+    
     def cleanup(self):
         """Cleanup all managers"""
         for manager in self.managers.values():
@@ -2,74 +2,561 @@
 SQLite Source - Fast chunked access with checksums.
 """
 
-import sqlite3
+import bisect
 import hashlib
-from typing import List, Tuple
-from app.core.exceptions import CorruptionError
+import json
+import os
+import pathlib
+import sqlite3
+import queue
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from typing import Iterable, List, Optional, Tuple
+from app.core.exceptions import CorruptionError, StorageError
+from app.storage.digit_packing import is_ascii_digits, pack_digits, unpack_digits
+
+# Bump when the math_chunks layout changes; caches with any other version
+# are dropped and rebuilt
+SCHEMA_VERSION = 1
+
+# Hot statements are kept as single constants so every call hands sqlite3 the
+# identical string and hits its per-connection prepared-statement cache
+_SQL_PUT = '''
+    INSERT OR REPLACE INTO math_chunks
+    (chunk_id, start_position, end_position, digits, checksum, checksum_algo)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Chunks never overlap, so the only chunk starting before a range that can
+# reach into it is the last one starting at or before it. Bounding the index
+# range below by that chunk keeps lookups a seek, where "start_position < end"
+# alone walks every earlier index entry.
+_RANGE_FILTER = '''
+    start_position < :end AND end_position > :start
+    AND start_position >= coalesce(
+        (SELECT max(start_position) FROM math_chunks WHERE start_position <= :start),
+        :start
+    )
+'''
+
+_SQL_GET = f'''
+    SELECT chunk_id, start_position, end_position, digits, checksum, checksum_algo
+    FROM math_chunks
+    WHERE {_RANGE_FILTER}
+    ORDER BY start_position
+'''
+
+# Small reads only pull the packed bytes they overlap out of each row
+_SQL_GET_SLICE = f'''
+    SELECT start_position, end_position, first_byte,
+           substr(digits, first_byte + 1,
+                  (min(end_position, :end) - start_position + 1) / 2 - first_byte)
+    FROM (
+        SELECT start_position, end_position, digits,
+               (max(start_position, :start) - start_position) / 2 AS first_byte
+        FROM math_chunks
+        WHERE {_RANGE_FILTER}
+    )
+    ORDER BY start_position
+'''
+
+# Unverified reads up to this many digits that miss the chunk cache are
+# sliced in SQL instead of loading (and caching) their whole chunks
+_SLICE_MAX_DIGITS = 1024
+
+# Chunks sliced this recently are loaded whole on their next read, so
+# sequential small reads fill the LRU after one slice per chunk
+_RECENT_SLICES = 16
+
+# Coverage and chunk count are kept in math_chunks_meta, updated in the same
+# transaction as every write, so reading them never aggregates over the table
+_SQL_STATS = 'SELECT k, v FROM math_chunks_meta'
+
+_SQL_COUNT = "SELECT v FROM math_chunks_meta WHERE k = 'count'"
+
+_SQL_SEED_STATS = '''
+    INSERT OR IGNORE INTO math_chunks_meta (k, v)
+    VALUES ('min_start', NULL), ('max_end', NULL), ('count', 0)
+'''
+
+# Rows an INSERT OR REPLACE batch will overwrite rather than add
+_SQL_COUNT_IDS = '''
+    SELECT COUNT(*) FROM math_chunks
+    WHERE chunk_id IN (SELECT value FROM json_each(?))
+'''
+
+_SQL_BUMP_STATS = '''
+    UPDATE math_chunks_meta SET v = CASE k
+        WHEN 'min_start' THEN coalesce(min(v, :min_start), :min_start)
+        WHEN 'max_end' THEN coalesce(max(v, :max_end), :max_end)
+        WHEN 'count' THEN v + :added
+    END
+'''
+
+_SQL_RESET_STATS = "UPDATE math_chunks_meta SET v = CASE k WHEN 'count' THEN 0 END"
+
+_SQL_SCAN = '''
+    SELECT chunk_id, start_position, end_position, digits, checksum, checksum_algo
+    FROM math_chunks
+    ORDER BY start_position
+'''
+
+# Rows fetched per batch while scrubbing with verify_all_chunks; with at most
+# two batches per worker in flight this bounds the digits held in memory
+_SCAN_BATCH_ROWS = 256
+
+# The background writer commits after this many queued chunks, or once the
+# oldest has waited this long
+_WRITE_QUEUE_BATCH = 256
+_WRITE_QUEUE_WAIT = 0.1
+
+_CACHED_STATEMENTS = 256
+
+# Let SQLite read database pages straight from a memory map of up to 1 GiB
+_MMAP_SIZE = 1024 * 1024 * 1024
+
+
+# Checksum functions by the name stored in checksum_algo. CRC-32 is the
+# default: it only has to catch storage corruption and runs in C at memory
+# speed. SHA-256 is there for deployments that want a cryptographic digest.
+_CHECKSUM_ALGOS = {
+    'crc32': zlib.crc32,
+    'sha256': lambda data: hashlib.sha256(data).digest(),
+}
+
+DEFAULT_CHECKSUM_ALGO = 'crc32'
+
+# Algorithms that release the GIL on chunk-sized buffers (hashlib above 2 KiB),
+# so verify_all_chunks hashes their batches on worker threads. zlib.crc32 only
+# releases it above 5 KiB and a packed default chunk is 5000 bytes, so CRC-32
+# batches are checked inline rather than paying for futures with no overlap.
+_THREADED_ALGOS = frozenset({'sha256'})
+
+
+def _checksum(data: bytes, algo: str = DEFAULT_CHECKSUM_ALGO):
+    """Checksum of a chunk's digits, used to detect storage corruption"""
+    try:
+        return _CHECKSUM_ALGOS[algo](data)
+    except KeyError:
+        raise CorruptionError(f"Unknown checksum algorithm: {algo}")
+
+
+def _verify_rows(rows) -> List[dict]:
+    """Recompute checksums for a batch of _SQL_SCAN rows"""
+    results = []
+    for chunk_id, start_pos, end_pos, digits, stored_checksum, algo in rows:
+        calculated_checksum = _checksum(digits, algo)
+        results.append({
+            'chunk_id': chunk_id,
+            'start_position': start_pos,
+            'end_position': end_pos,
+            'is_valid': calculated_checksum == stored_checksum,
+            'checksum_algo': algo,
+            'stored_checksum': stored_checksum,
+            'calculated_checksum': calculated_checksum
+        })
+    return results
+
+
+def _writer_loop(source_ref, write_queue: queue.Queue):
+    """Commit queued store_chunk rows in batches until None arrives
+    
+    Holds the source weakly between batches so it can still be collected.
+    """
+    while True:
+        batch = [write_queue.get()]
+        stop = batch[0] is None
+        deadline = time.monotonic() + _WRITE_QUEUE_WAIT
+        while not stop and len(batch) < _WRITE_QUEUE_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = write_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            stop = item is None
+        
+        rows = [item for item in batch if item is not None]
+        source = source_ref()
+        try:
+            if rows and source is not None:
+                source._write_queued(rows)
+        finally:
+            del source
+            for _ in batch:
+                write_queue.task_done()
+        if stop:
+            return
+
+
+class _ReaderSlot:
+    """A thread's read-only connection; its finalizer closes the connection
+    once the thread exits and its thread-local slot is collected."""
+    
+    __slots__ = ('conn', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class _ChunkCache:
+    """Byte-bounded LRU of loaded chunks, keyed by start position."""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._chunks: "OrderedDict[int, Tuple[int, bytes]]" = OrderedDict()
+        self._starts: List[int] = []
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def lookup(self, start: int, end: int) -> Optional[List[Tuple[int, int, bytes]]]:
+        """Cached chunks covering [start, end) without gaps, or None on a miss"""
+        with self._lock:
+            index = bisect.bisect_right(self._starts, start) - 1
+            if index < 0:
+                return None
+            
+            found = []
+            position = start
+            while position < end:
+                if index >= len(self._starts):
+                    return None
+                chunk_start = self._starts[index]
+                chunk_end, data = self._chunks[chunk_start]
+                if not chunk_start <= position < chunk_end:
+                    return None
+                found.append((chunk_start, chunk_end, data))
+                position = chunk_end
+                index += 1
+            
+            for chunk_start, _, _ in found:
+                self._chunks.move_to_end(chunk_start)
+            return found
+    
+    def add(self, chunk_start: int, chunk_end: int, data: bytes):
+        """Remember a verified chunk, evicting least recently used ones"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if chunk_start in self._chunks:
+                self._size -= len(self._chunks[chunk_start][1])
+            else:
+                bisect.insort(self._starts, chunk_start)
+            self._chunks[chunk_start] = (chunk_end, data)
+            self._chunks.move_to_end(chunk_start)
+            self._size += len(data)
+            
+            while self._size > self.max_bytes:
+                evicted_start, (_, evicted) = self._chunks.popitem(last=False)
+                self._starts.pop(bisect.bisect_left(self._starts, evicted_start))
+                self._size -= len(evicted)
+    
+    def clear(self):
+        """Drop all cached chunks"""
+        with self._lock:
+            self._chunks.clear()
+            self._starts.clear()
+            self._size = 0
 
 
 class SQLiteSource:
     """Source for reading from SQLite chunked storage."""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_bytes: int = 64 * 1024 * 1024,
+                 checksum_algo: str = DEFAULT_CHECKSUM_ALGO):
+        if checksum_algo not in _CHECKSUM_ALGOS:
+            raise StorageError(f"Unsupported checksum algorithm: {checksum_algo}")
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Used for new writes; rows keep the algorithm they were written with
+        self.checksum_algo = checksum_algo
+        self._cache = _ChunkCache(cache_bytes)
+        self._recent_slices: "deque[Tuple[int, int]]" = deque(maxlen=_RECENT_SLICES)
+        # Chunks are immutable once stored, so each only needs hashing once
+        self._verified: set[int] = set()
+        # Each thread reads through its own read-only connection so concurrent
+        # requests use WAL's parallel readers instead of sharing self.conn.
+        # Connections close when their thread exits, or all at once in close().
+        self._readers = threading.local()
+        self._reader_closers: "set[weakref.finalize]" = set()
+        self._readers_lock = threading.Lock()
+        # Stored chunk_ids behind contains(), reloaded whenever the persisted
+        # count shows another worker or process has changed the table
+        self._ids: set[int] = set()
+        # Writes are serialized on this lock; _tx_thread owns any open transaction
+        self._write_lock = threading.RLock()
+        self._tx_thread: Optional[int] = None
+        self._write_queue: "queue.Queue[Optional[Tuple[int, int, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        # (chunk_id, error) for queued rows the writer failed to store
+        self._writer_errors: "deque[Tuple[int, BaseException]]" = deque()
+        # Autocommit mode: writes are grouped by explicit BEGIN/COMMIT in transaction()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                    cached_statements=_CACHED_STATEMENTS)
+        self._configure_connection()
         self._init_tables()
+        self._load_ids()
+    
+    def _load_ids(self):
+        """Reload the committed chunk_ids behind contains()"""
+        cursor = self._reader().execute('SELECT chunk_id FROM math_chunks')
+        self._ids = {row[0] for row in cursor}
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Read-only connection for the calling thread, opened on first use"""
+        slot = getattr(self._readers, 'slot', None)
+        if slot is None:
+            uri = pathlib.Path(self.db_path).absolute().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=_CACHED_STATEMENTS)
+            conn.execute(f'PRAGMA mmap_size={_MMAP_SIZE}')
+            slot = _ReaderSlot(conn)
+            closer = weakref.finalize(slot, conn.close)
+            with self._readers_lock:
+                # Drop closers of threads that have already exited
+                self._reader_closers = {c for c in self._reader_closers if c.alive}
+                self._reader_closers.add(closer)
+            self._readers.slot = slot
+        return slot.conn
+    
+    def _configure_connection(self):
+        """Tune the connection for bulk cache writes alongside readers"""
+        # Only takes effect on a fresh database, so it must precede WAL setup
+        self.conn.execute('PRAGMA page_size=8192')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute(f'PRAGMA mmap_size={_MMAP_SIZE}')
+        self.conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
     
     def _init_tables(self):
         """Initialize database tables"""
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS math_chunks (
-                chunk_id INTEGER PRIMARY KEY,
-                start_position INTEGER NOT NULL,
-                end_position INTEGER NOT NULL,
-                digits TEXT NOT NULL,
-                checksum TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        self.conn.execute('''
-            CREATE INDEX IF NOT EXISTS idx_position 
-            ON math_chunks(start_position, end_position)
-        ''')
-        
-        self.conn.commit()
+        with self.transaction():
+            version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                existing = self.conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'math_chunks'"
+                ).fetchone()
+                if existing:
+                    print(f"♻️  SQLite cache schema is outdated, dropping it for rebuild: {self.db_path}")
+                    self.conn.execute('DROP TABLE math_chunks')
+                self.conn.execute('DROP TABLE IF EXISTS math_chunks_meta')
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS math_chunks (
+                    chunk_id INTEGER PRIMARY KEY,
+                    start_position INTEGER NOT NULL,
+                    end_position INTEGER NOT NULL,
+                    digits BLOB NOT NULL,
+                    checksum INTEGER NOT NULL,
+                    checksum_algo TEXT NOT NULL DEFAULT 'crc32',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_position 
+                ON math_chunks(start_position, end_position)
+            ''')
+            
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS math_chunks_meta (
+                    k TEXT PRIMARY KEY,
+                    v INTEGER
+                )
+            ''')
+            self.conn.execute(_SQL_SEED_STATS)
     
     def store_chunk(self, chunk_id: int, start_pos: int, digits: str):
-        """Store a chunk with checksum"""
-        end_pos = start_pos + len(digits)
-        checksum = hashlib.md5(digits.encode()).hexdigest()
+        """Queue a chunk for the background writer; flush() waits for it
+        
+        The chunk is validated, packed and hashed here, so bad digits raise
+        ValueError to the caller; the writer only inserts finished rows, in
+        batches, so producers never wait on a commit. Inside transaction()
+        the chunk is written straight into the open transaction instead.
+        """
+        row = self._pack_row(chunk_id, start_pos, digits)
+        if self._tx_thread == threading.get_ident():
+            self._write_rows([row])
+            return
+        self._start_writer()
+        self._write_queue.put(row)
+    
+    def store_chunks(self, chunks: Iterable[Tuple[int, int, str]]):
+        """Store many (chunk_id, start_pos, digits) chunks with a single commit
+        
+        Inside transaction() the rows join the open transaction instead.
+        """
+        rows = [self._pack_row(chunk_id, start_pos, digits)
+                for chunk_id, start_pos, digits in chunks]
+        # Queued single chunks go first so a later batch always wins
+        if self._tx_thread != threading.get_ident():
+            self.flush()
+        self._write_rows(rows)
+    
+    def _pack_row(self, chunk_id: int, start_pos: int, digits: str) -> tuple:
+        """Validate, pack and checksum one chunk into a _SQL_PUT row"""
+        if digits and not is_ascii_digits(digits):
+            raise ValueError("Can only store digit characters")
+        # Stored packed two digits per byte, which halves the rows, the pages
+        # read per range, and the bytes hashed; the checksum covers the packed form
+        algo = self.checksum_algo
+        packed = pack_digits(digits)
+        return (chunk_id, start_pos, start_pos + len(digits),
+                packed, _checksum(packed, algo), algo)
+    
+    def _write_rows(self, rows: List[tuple]):
+        """Insert packed rows, in the caller's transaction or a new one"""
+        if not rows:
+            return
+        
+        with self._write_lock:
+            if self._tx_thread is not None:
+                self._put_rows(rows)
+                self._after_write()
+            else:
+                with self._transaction():
+                    self._put_rows(rows)
+    
+    def _write_queued(self, rows: List[tuple]):
+        """Commit a batch for the background writer, keeping failures per chunk"""
+        try:
+            self._write_rows(rows)
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                self._writer_errors.append((rows[0][0], e))
+                return
+        # Retry one row at a time so a failing row doesn't take its neighbours down
+        for row in rows:
+            try:
+                self._write_rows([row])
+            except Exception as e:
+                self._writer_errors.append((row[0], e))
+    
+    def _put_rows(self, rows: List[tuple]):
+        """Insert packed rows and fold them into math_chunks_meta; needs an open transaction"""
+        chunk_ids = {row[0] for row in rows}
+        replaced = self.conn.execute(_SQL_COUNT_IDS, (json.dumps(list(chunk_ids)),)).fetchone()[0]
+        self.conn.executemany(_SQL_PUT, rows)
+        # Replaced chunks keep their chunk_id's position, so coverage only grows
+        self.conn.execute(_SQL_BUMP_STATS, {
+            'min_start': min(row[1] for row in rows),
+            'max_end': max(row[2] for row in rows),
+            'added': len(chunk_ids) - replaced,
+        })
+        self._verified.difference_update(chunk_ids)
+        self._ids.update(chunk_ids)
+    
+    def transaction(self):
+        """Group store_chunk(s) calls into one transaction and one commit
         
-        self.conn.execute('''
-            INSERT OR REPLACE INTO math_chunks 
-            (chunk_id, start_position, end_position, digits, checksum)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (chunk_id, start_pos, end_pos, digits, checksum))
+        Commits when the block exits cleanly and rolls back if it raises.
+        """
+        self.flush()
+        return self._transaction()
+    
+    @contextmanager
+    def _transaction(self):
+        """transaction() without first waiting for the background writer"""
+        with self._write_lock:
+            if self._tx_thread is not None:
+                raise StorageError("SQLite transaction already open")
+            self.conn.execute('BEGIN IMMEDIATE')
+            self._tx_thread = threading.get_ident()
+            try:
+                yield self
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                # Forget ids added by the rolled-back writes
+                self._load_ids()
+                raise
+            else:
+                self.conn.execute('COMMIT')
+            finally:
+                self._tx_thread = None
+                # Readers may have cached pre-commit rows while the block was open
+                self._after_write()
+    
+    def _start_writer(self):
+        """Start the background writer thread on first use"""
+        if self._writer is None:
+            with self._readers_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=_writer_loop, args=(weakref.ref(self), self._write_queue),
+                        name="sqlite-chunk-writer", daemon=True
+                    )
+                    self._writer.start()
+    
+    def flush(self):
+        """Wait until every queued store_chunk has been committed
         
-        self.conn.commit()
+        Raises StorageError naming the queued chunks the writer failed to store.
+        """
+        self._wait_for_writer()
+        failures = []
+        while self._writer_errors:
+            failures.append(self._writer_errors.popleft())
+        if failures:
+            chunk_ids = ', '.join(str(chunk_id) for chunk_id, _ in failures)
+            raise StorageError(f"Background write failed for chunk(s) {chunk_ids}: {failures[-1][1]}")
     
-    def get(self, start: int, length: int) -> str:
-        """Get digits from database, potentially spanning multiple chunks"""
+    def _wait_for_writer(self):
+        """Block until the writer has drained the queue, unless called from it"""
+        writer = self._writer
+        if writer is not None and writer.ident != threading.get_ident():
+            self._write_queue.join()
+    
+    def _sync_writes(self):
+        """Make queued chunks visible before a read, unless this thread holds the write lock
+        
+        Write failures are left for flush() so they reach a writer, not a reader.
+        """
+        if self._writer is not None and self._write_queue.unfinished_tasks \
+                and self._tx_thread != threading.get_ident():
+            self._wait_for_writer()
+    
+    def _after_write(self):
+        """Drop in-memory state that a write may have made stale"""
+        self._cache.clear()
+    
+    def get(self, start: int, length: int, verify: bool = False) -> str:
+        """Get digits from database, potentially spanning multiple chunks
+        
+        With verify=True, chunks not yet checksummed in this process are
+        checked before use; verify_all_chunks() is the full scrub.
+        """
         end = start + length
+        self._sync_writes()
         
-        cursor = self.conn.execute('''
-            SELECT start_position, end_position, digits, checksum
-            FROM math_chunks
-            WHERE start_position < ? AND end_position > ?
-            ORDER BY start_position
-        ''', (end, start))
+        # Serve ranges whose chunks are all cached without touching SQLite.
+        # Cached chunks may be unverified, so verified reads go to the rows.
+        chunks = None if verify else self._cache.lookup(start, end)
+        if chunks is None:
+            if not verify and length <= _SLICE_MAX_DIGITS and not self._recently_sliced(start):
+                chunks = self._load_slices(start, end)
+            else:
+                chunks = self._load_chunks(start, end, verify)
         
-        chunks = cursor.fetchall()
-        if not chunks:
-            raise ValueError(f"No data found for range {start}-{end}")
+        # Reads inside a single chunk decode one slice without assembling
+        if len(chunks) == 1:
+            chunk_start, chunk_end, chunk_digits = chunks[0]
+            if chunk_start <= start and end <= chunk_end:
+                offset = start - chunk_start
+                return chunk_digits[offset:offset + length].decode('ascii')
         
-        result = ""
-        for chunk_start, chunk_end, chunk_digits, checksum in chunks:
-            # Verify checksum
-            if hashlib.md5(chunk_digits.encode()).hexdigest() != checksum:
-                raise CorruptionError(f"Checksum mismatch in chunk {chunk_start}-{chunk_end}")
-            
+        # Copy each overlap straight into a buffer sized for the whole range
+        result = bytearray(length)
+        copied = 0
+        for chunk_start, chunk_end, chunk_digits in chunks:
             # Calculate overlap with requested range
             overlap_start = max(start, chunk_start)
             overlap_end = min(end, chunk_end)
@@ -78,82 +565,190 @@ class SQLiteSource:
                 # Extract the relevant portion
                 chunk_offset = overlap_start - chunk_start
                 chunk_length = overlap_end - overlap_start
-                result += chunk_digits[chunk_offset:chunk_offset + chunk_length]
+                result_offset = overlap_start - start
+                with memoryview(chunk_digits) as view:
+                    result[result_offset:result_offset + chunk_length] = \
+                        view[chunk_offset:chunk_offset + chunk_length]
+                copied += chunk_length
+        
+        if copied != length:
+            raise ValueError(f"Retrieved {copied} digits, expected {length}")
+        
+        return result.decode('ascii')
+    
+    def _load_slices(self, start: int, end: int) -> List[Tuple[int, int, bytes]]:
+        """Fetch just the parts of each chunk overlapping [start, end), uncached
+        
+        Returned in the same (start, end, digits) form as _load_chunks, with
+        each slice widened to whole packed bytes.
+        """
+        cursor = self._reader().execute(_SQL_GET_SLICE, {'start': start, 'end': end})
+        
+        rows = cursor.fetchall()
+        if not rows:
+            raise ValueError(f"No data found for range {start}-{end}")
+        
+        slices = []
+        for chunk_start, chunk_end, first_byte, packed in rows:
+            self._recent_slices.append((chunk_start, chunk_end))
+            slice_start = chunk_start + 2 * first_byte
+            digits = unpack_digits(packed).encode('ascii')
+            # The last byte of an odd-length chunk carries a padding nibble
+            slices.append((slice_start, min(slice_start + len(digits), chunk_end), digits))
+        
+        return slices
+    
+    def _recently_sliced(self, position: int) -> bool:
+        """True if a recent slice read came from the chunk holding position"""
+        # tuple() copies the deque in one step, safe against concurrent appends
+        return any(chunk_start <= position < chunk_end
+                   for chunk_start, chunk_end in tuple(self._recent_slices))
+    
+    def _load_chunks(self, start: int, end: int, verify: bool) -> List[Tuple[int, int, bytes]]:
+        """Fetch (and optionally verify) the chunks overlapping [start, end), caching them"""
+        cursor = self._reader().execute(_SQL_GET, {'start': start, 'end': end})
+        
+        rows = cursor.fetchall()
+        if not rows:
+            raise ValueError(f"No data found for range {start}-{end}")
+        
+        chunks = []
+        for chunk_id, chunk_start, chunk_end, chunk_digits, checksum, algo in rows:
+            # Verify checksum the first time this chunk is read with verify on
+            if verify and chunk_id not in self._verified:
+                if _checksum(chunk_digits, algo) != checksum:
+                    raise CorruptionError(f"Checksum mismatch in chunk {chunk_start}-{chunk_end}")
+                self._verified.add(chunk_id)
+            
+            # Unpacked once here; cached chunks hold ASCII digits ready to slice
+            chunk_digits = unpack_digits(chunk_digits)[:chunk_end - chunk_start].encode('ascii')
+            
+            self._cache.add(chunk_start, chunk_end, chunk_digits)
+            chunks.append((chunk_start, chunk_end, chunk_digits))
         
-        if len(result) != length:
-            raise ValueError(f"Retrieved {len(result)} digits, expected {length}")
+        return chunks
+    
+    def _get_stats(self) -> Tuple[int, int, int]:
+        """Coverage and chunk count from math_chunks_meta
+        
+        Read on every call rather than memoized, so writes from other workers
+        and processes sharing the database are seen immediately.
+        """
+        self._sync_writes()
+        meta = dict(self._reader().execute(_SQL_STATS).fetchall())
+        return (meta.get('min_start') or 0, meta.get('max_end') or 0, meta.get('count') or 0)
+    
+    def contains(self, chunk_id: int) -> bool:
+        """Check whether a chunk_id is stored
         
-        return result
+        Costs one meta-row lookup; the ids themselves are only re-read when
+        the stored count no longer matches the in-memory set.
+        """
+        self._sync_writes()
+        # Inside our own transaction the reader can't see the uncommitted rows yet
+        if self._tx_thread != threading.get_ident():
+            count = self._reader().execute(_SQL_COUNT).fetchone()[0]
+            if count != len(self._ids):
+                self._load_ids()
+        return chunk_id in self._ids
     
     def has_data(self) -> bool:
         """Check if the database has any data"""
         try:
-            cursor = self.conn.execute('SELECT COUNT(*) FROM math_chunks')
-            count = cursor.fetchone()[0]
-            return count > 0
-        except:
+            return self._get_stats()[2] > 0
+        except sqlite3.Error:
             return False
     
     def get_chunk_count(self) -> int:
         """Get total number of chunks stored"""
         try:
-            cursor = self.conn.execute('SELECT COUNT(*) FROM math_chunks')
-            return cursor.fetchone()[0]
-        except:
+            return self._get_stats()[2]
+        except sqlite3.Error:
             return 0
     
     def get_coverage_range(self) -> tuple:
         """Get the range of positions covered by stored chunks"""
         try:
-            cursor = self.conn.execute('''
-                SELECT MIN(start_position), MAX(end_position) 
-                FROM math_chunks
-            ''')
-            result = cursor.fetchone()
-            if result and result[0] is not None:
-                return result
-            else:
-                return (0, 0)
-        except:
+            min_start, max_end, _ = self._get_stats()
+            return (min_start, max_end)
+        except sqlite3.Error:
             return (0, 0)
     
-    def verify_all_chunks(self) -> List[dict]:
-        """Verify checksums of all stored chunks"""
+    def verify_all_chunks(self, max_workers: Optional[int] = None) -> List[dict]:
+        """Verify checksums of all stored chunks
+        
+        Rows are streamed in batches. Batches containing SHA-256 rows are
+        hashed on worker threads, which hashlib lets run in parallel; CRC-32
+        batches are cheaper to check inline. Results come back in chunk order.
+        """
+        self._sync_writes()
         verification_results = []
+        max_workers = max_workers or os.cpu_count() or 1
         
+        executor = None
         try:
-            cursor = self.conn.execute('''
-                SELECT chunk_id, start_position, end_position, digits, checksum
-                FROM math_chunks
-                ORDER BY start_position
-            ''')
+            cursor = self._reader().cursor()
+            cursor.arraysize = _SCAN_BATCH_ROWS
+            # Result lists from inline batches and futures from threaded ones, in chunk order
+            pending = deque()
             
-            for chunk_id, start_pos, end_pos, digits, stored_checksum in cursor:
-                calculated_checksum = hashlib.md5(digits.encode()).hexdigest()
-                is_valid = calculated_checksum == stored_checksum
-                
-                verification_results.append({
-                    'chunk_id': chunk_id,
-                    'start_position': start_pos,
-                    'end_position': end_pos,
-                    'is_valid': is_valid,
-                    'stored_checksum': stored_checksum,
-                    'calculated_checksum': calculated_checksum
-                })
-                
-                if not is_valid:
-                    print(f"❌ Chunk {chunk_id} failed verification at position {start_pos}")
+            with closing(cursor):
+                cursor.execute(_SQL_SCAN)
+                while True:
+                    rows = cursor.fetchmany()
+                    if rows:
+                        if any(row[5] in _THREADED_ALGOS for row in rows):
+                            # The pool is only worth starting once a batch can use it
+                            if executor is None:
+                                executor = ThreadPoolExecutor(max_workers=max_workers)
+                            pending.append(executor.submit(_verify_rows, rows))
+                        else:
+                            pending.append(_verify_rows(rows))
+                    
+                    # Record finished batches as soon as they are at the head; bound
+                    # the threaded ones in flight; drain everything at the end
+                    while pending and (not rows or isinstance(pending[0], list)
+                                       or len(pending) >= max_workers * 2):
+                        batch = pending.popleft()
+                        for result in batch if isinstance(batch, list) else batch.result():
+                            self._record_verification(result)
+                            verification_results.append(result)
+                    
+                    if not rows:
+                        break
         
         except Exception as e:
             print(f"Error during chunk verification: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         return verification_results
     
+    def _record_verification(self, result: dict):
+        """Update the verified-id set from one verify_all_chunks result"""
+        if result['is_valid']:
+            self._verified.add(result['chunk_id'])
+        else:
+            self._verified.discard(result['chunk_id'])
+            print(f"❌ Chunk {result['chunk_id']} failed verification at position {result['start_position']}")
+    
+    def invalidate_cache(self):
+        """Forget cached and verified chunks after another process rewrote the database"""
+        self._verified.clear()
+        self._cache.clear()
+        self._load_ids()
+    
     def clear_all_data(self):
         """Clear all stored chunks (use with caution)"""
         try:
-            self.conn.execute('DELETE FROM math_chunks')
-            self.conn.commit()
+            self.flush()
+            with self._write_lock, self._transaction():
+                self.conn.execute('DELETE FROM math_chunks')
+                self.conn.execute(_SQL_RESET_STATS)
+            self._ids.clear()
+            self._verified.clear()
+            self._cache.clear()
             print("✅ All chunks cleared from database")
         except Exception as e:
             print(f"❌ Error clearing chunks: {e}")
@@ -189,8 +784,26 @@ class SQLiteSource:
             return {'error': str(e)}
     
     def close(self):
-        """Close database connection"""
+        """Finish queued writes and close database connections"""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._write_queue.put(None)
+            if writer is not threading.current_thread():
+                writer.join()
+        while self._writer_errors:
+            chunk_id, error = self._writer_errors.popleft()
+            print(f"❌ Background write of chunk {chunk_id} failed: {error}")
+        with self._readers_lock:
+            for closer in self._reader_closers:
+                closer()
+            self._reader_closers.clear()
+        self._readers = threading.local()
         if self.conn:
+            try:
+                # Refresh planner statistics gathered during this session
+                self.conn.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
             self.conn.close()
     
     def __del__(self):
@@ -0,0 +1,69 @@
+"""
+Binary Source Tests
+
+Packed storage of chunks that start or end between the two digits of a byte.
+"""
+
+import random
+
+import pytest
+
+from app.storage.binary_source import BinarySource
+from tests import TEST_CONSTANTS, TEST_DATA_SIZE
+
+PI = TEST_CONSTANTS["pi"]
+
+
+def _digits(count: int) -> str:
+    """count pseudo-random digits, seeded so failures reproduce"""
+    rng = random.Random(count)
+    return ''.join(rng.choice('0123456789') for _ in range(count))
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A fresh binary source, closed after the test"""
+    source = BinarySource(str(tmp_path / "binary.dat"))
+    yield source
+    source.close()
+
+
+@pytest.mark.parametrize("chunk_size", [7, 333, 2001])
+def test_odd_chunks_stored_out_of_order(source, chunk_size):
+    digits = _digits(chunk_size * 9 + 4)
+    chunks = [(start, digits[start:start + chunk_size])
+              for start in range(0, len(digits), chunk_size)]
+    random.Random(chunk_size).shuffle(chunks)
+
+    for start, chunk in chunks:
+        source.store_chunk(start, chunk)
+    source.flush()
+
+    assert source.get(0, len(digits)) == digits
+    # Reads straddling each chunk boundary, on both nibbles
+    for boundary in range(chunk_size, len(digits), chunk_size):
+        for start in (boundary - 3, boundary - 2):
+            assert source.get(start, 5) == digits[start:start + 5]
+
+
+def test_odd_chunk_does_not_clobber_its_neighbours(source):
+    source.store_chunk(0, PI[:10])
+    source.store_chunk(20, PI[20:30])
+    # Odd start and odd end: shares a byte with the digit on each side
+    source.store_chunk(10, PI[10:20])
+    source.store_chunk(3, PI[3:8])
+    source.flush()
+
+    assert source.get(0, 30) == PI[:30]
+
+
+def test_odd_chunks_across_flushes(source):
+    digits = _digits(TEST_DATA_SIZE + 1)
+    for start in range(0, len(digits), 101):
+        source.store_chunk(start, digits[start:start + 101])
+        # Force the ragged bytes to be read back from disk, not the buffer
+        source.flush()
+
+    assert source.get(0, len(digits)) == digits
+    ranges = [(99, 5), (201, 4), (500, 101), (len(digits) - 3, 3)]
+    assert source.get_many(ranges) == [digits[s:s + n] for s, n in ranges]
@@ -0,0 +1,57 @@
+"""
+File Source Tests
+
+Reads racing a remap after the original file grows.
+"""
+
+import threading
+
+import pytest
+
+from app.storage.file_source import FileSource
+from tests import TEST_CONSTANTS
+
+PI = TEST_CONSTANTS["pi"]
+
+
+@pytest.fixture
+def path(tmp_path):
+    """An original file holding the first 50 digits of pi"""
+    path = tmp_path / "pi_digits.txt"
+    path.write_text(PI[0] + "." + PI[1:])
+    return path
+
+
+def test_reads_survive_concurrent_remaps(path):
+    source = FileSource(str(path))
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                assert source.get(2, 10) == PI[1:11]
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        size = len(PI) + 1
+        for _ in range(200):
+            if stop.is_set():
+                break
+            with open(path, "a") as f:
+                f.write(PI)
+            size += len(PI)
+            # Reading past the old mapping makes this thread remap
+            assert source.get(size - 5, 5) == PI[-5:]
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+        source.close()
+
+    assert not errors
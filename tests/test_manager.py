@@ -0,0 +1,66 @@
+"""
+Storage Manager Tests
+
+Background verifier shutdown.
+"""
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from app.storage import manager as manager_module
+from app.storage.manager import MathConstantManager, StorageConfig
+from tests import TEST_CONSTANTS, TEST_DATA_SIZE
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Storage config over a small pi file"""
+    digits = (TEST_CONSTANTS["pi"] * (TEST_DATA_SIZE // 50 + 1))[:TEST_DATA_SIZE]
+    original = tmp_path / "pi_digits.txt"
+    original.write_text(digits[0] + "." + digits[1:] + "\n")
+    return StorageConfig(
+        original_file=str(original),
+        sqlite_db=str(tmp_path / "pi_chunks.db"),
+        binary_file=str(tmp_path / "pi_binary.dat"),
+        chunk_size=100,
+        verify_every=1,
+    )
+
+
+def test_cleanup_stops_verifier(config):
+    manager = MathConstantManager(config)
+    verifier = manager._verifier
+    manager.cleanup()
+    verifier.join(timeout=5)
+    assert not verifier.is_alive()
+
+
+def test_last_reference_dropped_on_verifier_thread(config, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_cross_check(self, start, length, result):
+        started.set()
+        release.wait(timeout=5)
+
+    monkeypatch.setattr(MathConstantManager, "_cross_check", slow_cross_check)
+
+    manager = MathConstantManager(config)
+    verifier, sqlite = manager._verifier, manager.sqlite_source
+    manager._verify_queue.put((0, 1, "3"))
+    assert started.wait(timeout=5)
+    # Fill the queue so a blocking sentinel put could never complete
+    for _ in range(manager_module.VERIFY_QUEUE_SIZE):
+        manager._verify_queue.put_nowait((0, 1, "3"))
+
+    # The verifier now holds the last reference, so cleanup runs on its thread
+    del manager
+    gc.collect()
+    release.set()
+
+    verifier.join(timeout=5)
+    assert not verifier.is_alive()
+    with pytest.raises(sqlite3.ProgrammingError):
+        sqlite.conn.execute("SELECT 1")
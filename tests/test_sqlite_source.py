@@ -0,0 +1,286 @@
+"""
+SQLite Source Tests
+
+Background chunk writer: ordering, error reporting and failure isolation;
+per-thread reader connections; the persisted coverage and chunk count;
+checksum scrubbing; packed-nibble arithmetic of sliced reads.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from app.core.exceptions import StorageError
+from app.storage import sqlite_source
+from app.storage.sqlite_source import SQLiteSource
+from tests import TEST_CONSTANTS
+
+PI = TEST_CONSTANTS["pi"]
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A fresh SQLite source, closed after the test"""
+    source = SQLiteSource(str(tmp_path / "chunks.db"))
+    yield source
+    source.close()
+
+
+@pytest.fixture
+def one_batch(monkeypatch):
+    """Make the writer collect exactly three queued chunks into one batch"""
+    monkeypatch.setattr(sqlite_source, "_WRITE_QUEUE_BATCH", 3)
+    monkeypatch.setattr(sqlite_source, "_WRITE_QUEUE_WAIT", 5.0)
+
+
+def test_flush_commits_queued_chunks(source):
+    for chunk_id in range(5):
+        source.store_chunk(chunk_id, chunk_id * 10, PI[chunk_id * 10:chunk_id * 10 + 10])
+    source.flush()
+
+    assert source.get_chunk_count() == 5
+    assert source.get(0, 50) == PI
+
+
+def test_later_writes_win(source):
+    source.store_chunk(0, 0, "1111")
+    source.store_chunk(0, 0, "2222")
+    source.flush()
+    assert source.get(0, 4) == "2222"
+
+    # Chunks still queued are written before a later store_chunks batch
+    source.store_chunk(0, 0, "3333")
+    source.store_chunks([(0, 0, "4444")])
+    assert source.get(0, 4) == "4444"
+    assert source.get_chunk_count() == 1
+
+
+def test_reads_see_queued_chunks(source):
+    source.store_chunk(0, 0, PI[:10])
+    assert source.has_data()
+    assert source.contains(0)
+    assert source.get(0, 10) == PI[:10]
+
+
+def test_store_chunk_inside_transaction_writes_directly(source):
+    with source.transaction():
+        source.store_chunk(0, 0, PI[:10])
+        assert source._write_queue.unfinished_tasks == 0
+    assert source.get(0, 10) == PI[:10]
+
+
+def test_invalid_digits_raise_to_the_caller(source):
+    source.store_chunk(0, 0, "1234")
+    with pytest.raises(ValueError):
+        source.store_chunk(1, 4, "56x8")
+    # Hex letters would pack, but are not digits either
+    with pytest.raises(ValueError):
+        source.store_chunk(1, 4, "56a8")
+
+    source.flush()
+    assert source.contains(0)
+    assert not source.contains(1)
+    assert source.get(0, 4) == "1234"
+
+
+def test_invalid_batch_is_rejected_whole(source):
+    with pytest.raises(ValueError):
+        source.store_chunks([(0, 0, "1234"), (1, 4, "56x8")])
+    assert not source.has_data()
+
+
+def test_failed_row_does_not_drop_its_neighbours(source, one_batch):
+    # A text chunk_id packs fine but is rejected by SQLite as a rowid
+    source.store_chunk(0, 0, "1234")
+    source.store_chunk("bad", 4, "5678")
+    source.store_chunk(2, 8, "9012")
+
+    with pytest.raises(StorageError, match="bad"):
+        source.flush()
+
+    assert source.contains(0)
+    assert source.contains(2)
+    assert source.get_chunk_count() == 2
+    assert source.get(8, 4) == "9012"
+
+
+def test_write_errors_are_left_for_flush(source):
+    source.store_chunk("bad", 0, "1234")
+
+    # Reads wait for the writer but never consume its errors
+    assert not source.has_data()
+    assert not source.contains("bad")
+
+    with pytest.raises(StorageError):
+        source.flush()
+    # Each failure is reported once
+    source.flush()
+
+
+def test_close_commits_queued_chunks(tmp_path):
+    db_path = str(tmp_path / "chunks.db")
+    source = SQLiteSource(db_path)
+    source.store_chunk(0, 0, PI[:10])
+    source.close()
+
+    reopened = SQLiteSource(db_path)
+    try:
+        assert reopened.contains(0)
+        assert reopened.get(0, 10) == PI[:10]
+    finally:
+        reopened.close()
+
+
+def test_reader_connection_closes_with_its_thread(source):
+    source.store_chunks([(0, 0, PI[:10])])
+    readers = []
+
+    def read():
+        assert source.get(0, 10) == PI[:10]
+        readers.append(source._reader())
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        readers[0].execute("SELECT 1")
+    # The calling thread's own reader is unaffected
+    assert source.get(0, 10) == PI[:10]
+
+
+def _aggregate_stats(db_path):
+    """(min start, max end, count) computed from the chunk rows themselves"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT coalesce(MIN(start_position), 0), coalesce(MAX(end_position), 0), COUNT(*) "
+            "FROM math_chunks"
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def test_stats_count_replaced_chunks_once(source):
+    source.store_chunks([(0, 0, PI[:10]), (1, 10, PI[10:20])])
+    source.store_chunks([(1, 10, PI[10:20]), (2, 20, PI[20:30])])
+
+    assert source.get_chunk_count() == 3
+    assert source.get_coverage_range() == (0, 30)
+    assert source._get_stats() == _aggregate_stats(source.db_path)
+
+
+def test_stats_count_duplicate_ids_in_one_batch_once(source):
+    source.store_chunks([(0, 0, "1111"), (0, 0, "2222"), (1, 4, "3333")])
+
+    assert source.get_chunk_count() == 2
+    assert source.get(0, 8) == "22223333"
+    assert source._get_stats() == _aggregate_stats(source.db_path)
+
+
+def test_clear_all_data_resets_stats(source):
+    source.store_chunks([(0, 0, PI[:10]), (1, 10, PI[10:20])])
+    source.clear_all_data()
+
+    assert not source.has_data()
+    assert source.get_chunk_count() == 0
+    assert source.get_coverage_range() == (0, 0)
+
+    source.store_chunks([(5, 50, "1234")])
+    assert source._get_stats() == (50, 54, 1)
+    assert source._get_stats() == _aggregate_stats(source.db_path)
+
+
+def test_stats_see_writes_from_another_source(tmp_path):
+    db_path = str(tmp_path / "chunks.db")
+    writer, reader = SQLiteSource(db_path), SQLiteSource(db_path)
+    try:
+        assert not reader.has_data()
+
+        writer.store_chunks([(0, 0, PI[:10])])
+
+        assert reader.has_data()
+        assert reader.get_chunk_count() == 1
+        assert reader.get_coverage_range() == (0, 10)
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_contains_sees_chunks_from_another_source(tmp_path):
+    db_path = str(tmp_path / "chunks.db")
+    writer, reader = SQLiteSource(db_path), SQLiteSource(db_path)
+    try:
+        assert not reader.contains(0)
+
+        writer.store_chunks([(0, 0, PI[:10]), (1, 10, PI[10:20])])
+        assert reader.contains(0)
+        assert reader.contains(1)
+
+        writer.clear_all_data()
+        assert not reader.contains(0)
+    finally:
+        writer.close()
+        reader.close()
+
+
+@pytest.mark.parametrize("algo", ["crc32", "sha256"])
+def test_verify_all_chunks_reports_in_chunk_order(tmp_path, monkeypatch, algo):
+    monkeypatch.setattr(sqlite_source, "_SCAN_BATCH_ROWS", 4)
+    source = SQLiteSource(str(tmp_path / "chunks.db"), checksum_algo=algo)
+    try:
+        source.store_chunks([(chunk_id, chunk_id * 5, PI[chunk_id * 5:chunk_id * 5 + 5])
+                             for chunk_id in range(10)])
+        source.conn.execute("UPDATE math_chunks SET digits = x'0000' WHERE chunk_id = 7")
+
+        results = source.verify_all_chunks(max_workers=2)
+
+        assert [r['chunk_id'] for r in results] == list(range(10))
+        assert [r['chunk_id'] for r in results if not r['is_valid']] == [7]
+        assert all(r['checksum_algo'] == algo for r in results)
+    finally:
+        source.close()
+
+
+def _odd_chunks(source, chunk_size, total):
+    """Store total digits of pi-derived data in chunk_size pieces; returns them"""
+    digits = (PI * (total // len(PI) + 1))[:total]
+    source.store_chunks([(chunk_id, start, digits[start:start + chunk_size])
+                         for chunk_id, start in enumerate(range(0, total, chunk_size))])
+    return digits
+
+
+def _sliced_get(source, start, length):
+    """get() forced down the SQL slice path"""
+    source._cache.clear()
+    source._recent_slices.clear()
+    result = source.get(start, length)
+    assert source._recent_slices, "read did not take the slice path"
+    return result
+
+
+@pytest.mark.parametrize("chunk_size", [7, 10, 13])
+def test_sliced_reads_match_stored_digits(source, chunk_size):
+    total = chunk_size * 6 - 2  # the last chunk is shorter, and odd for even sizes
+    digits = _odd_chunks(source, chunk_size, total)
+
+    for start in range(total):
+        # Within one chunk, across one boundary, and across several
+        for length in (1, 2, 3, chunk_size, 2 * chunk_size + 1):
+            if start + length > total:
+                continue
+            expected = digits[start:start + length]
+            assert _sliced_get(source, start, length) == expected, (start, length)
+            # The whole-chunk path has to agree with the sliced one
+            assert source.get(start, length, verify=True) == expected, (start, length)
+
+
+def test_sliced_read_stops_at_padding_nibble(source):
+    # Odd-length final chunk: its last packed byte carries a padding 0
+    digits = _odd_chunks(source, 9, 27)
+
+    assert _sliced_get(source, 24, 3) == digits[24:27]
+    assert _sliced_get(source, 26, 1) == digits[26]
+    with pytest.raises(ValueError):
+        _sliced_get(source, 25, 3)